@@ -1,18 +1,45 @@
 import pandas as pd
-from math import radians, sin, cos, sqrt, asin
-from flask import Flask, request, render_template, redirect, url_for, jsonify, send_from_directory, make_response, session, flash
+import numpy as np
+from math import radians, sin, cos, sqrt, asin, pi
+from flask import Flask, request, render_template, redirect, url_for, send_file, make_response, session, flash
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+from flask_compress import Compress
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
+import operator
 import os
+import re
+import hashlib
+import threading
+from io import BytesIO
 from fpdf import FPDF, XPos, YPos
+from jinja2 import FileSystemBytecodeCache
 from datetime import datetime
 import bcrypt
-from functools import wraps
+import orjson
+from functools import wraps, lru_cache
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+try:
+    from sklearn.neighbors import BallTree
+except ImportError:  # scikit-learn is optional; fall back to the vectorized NumPy search
+    BallTree = None
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; region names are matched with NumPy instead
+    ahocorasick = None
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; plain Python/NumPy haversine is used instead
+    njit = None
 
 # Initialize the Flask app
 app = Flask(__name__)
 CORS(app)  # Allow cross-origin requests from frontend
+Compress(app)  # Gzip text responses (HTML, JSON); PDFs are already compressed and left as-is
 
 # Configure the secret key for sessions
 app.config['SECRET_KEY'] = 'your-secret-key-change-in-production'  # Change this in production
@@ -20,8 +47,18 @@ app.config['SECRET_KEY'] = 'your-secret-key-change-in-production'  # Change this
 # Configure the database file
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///rtrwh_data.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Keep a small pool of connections per worker, checking them before use and recycling stale ones
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': 5,
+    'pool_pre_ping': True,
+    'pool_recycle': 1800
+}
 db = SQLAlchemy(app)
 
+# Cache compiled template bytecode on disk (in the system temp directory) so worker
+# restarts skip recompilation. Auto-reload already follows app.debug.
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+
 # Initialize Flask-Login
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -31,15 +68,77 @@ login_manager.login_message = 'Please log in to access the admin panel.'
 # --- Path Configuration ---
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 CSV_FILE_PATH = os.path.join(BASE_DIR, 'data', 'mock_location_data.csv')
+PARQUET_FILE_PATH = os.path.join(BASE_DIR, 'data', 'mock_location_data.parquet')  # see scripts/convert_location_data.py
+
+def load_location_data():
+    """Read the location table, preferring the Parquet copy when it is not older than the CSV."""
+    if os.path.exists(PARQUET_FILE_PATH) and (
+            not os.path.exists(CSV_FILE_PATH)
+            or os.path.getmtime(PARQUET_FILE_PATH) >= os.path.getmtime(CSV_FILE_PATH)):
+        try:
+            return pd.read_parquet(PARQUET_FILE_PATH, engine='pyarrow')
+        except ImportError:
+            pass  # pyarrow is not installed; fall back to the CSV
+    return pd.read_csv(CSV_FILE_PATH)
 
 # --- Pre-load Data ---
 # Load location data into memory at startup to avoid repeated file reads
 try:
-    location_df = pd.read_csv(CSV_FILE_PATH)
+    location_df = load_location_data()
 except FileNotFoundError:
     location_df = None
     print(f"CRITICAL ERROR: Location data file not found at '{CSV_FILE_PATH}'. The application will not be able to provide location-based analysis.")
 
+# Keywords behind the recharge safety check, shared by the load-time flags below and by
+# _normalize_location so CSV rows and ad-hoc API input get the same verdicts
+POOR_WATER_QUALITIES = ('poor', 'contaminated')
+RESTRICTED_REMARK_TERMS = ('overexploited', 'prohibited')
+
+# Pre-normalize the text columns used by the recharge safety check so requests
+# read a boolean flag instead of lowercasing strings on every call
+if location_df is not None:
+    location_df['_poor_water_quality'] = location_df['Water_Quality'].fillna('').str.lower().isin(POOR_WATER_QUALITIES)
+    location_df['_recharge_restricted'] = location_df['Remarks'].fillna('').str.lower().str.contains(
+        '|'.join(map(re.escape, RESTRICTED_REMARK_TERMS)), regex=True)
+
+# Plain-dict copy of every row, so lookups copy one small dict instead of building a pandas Series
+if location_df is not None:
+    LOCATION_RECORDS = location_df.to_dict('records')
+else:
+    LOCATION_RECORDS = None
+
+# Pre-compute coordinate arrays (in radians) for the vectorized nearest-location search.
+# Contiguous float32 halves the memory traffic; cos(latitude) never changes, so compute it once.
+if location_df is not None:
+    LAT_RAD = np.ascontiguousarray(np.radians(location_df['Latitude'].to_numpy()), dtype=np.float32)
+    LON_RAD = np.ascontiguousarray(np.radians(location_df['Longitude'].to_numpy()), dtype=np.float32)
+    COS_LAT = np.cos(LAT_RAD)
+else:
+    LAT_RAD = LON_RAD = COS_LAT = None
+
+# Lowercased region names, computed once for case-insensitive name matching
+if location_df is not None:
+    REGION_NAMES_LOWER = location_df['Region_Name'].str.lower().to_numpy(dtype=str)
+else:
+    REGION_NAMES_LOWER = None
+
+# Aho-Corasick automaton over the region names: finds every region name contained in a
+# location string in a single pass over that string, independent of the number of regions
+if location_df is not None and ahocorasick is not None:
+    REGION_MATCHER = ahocorasick.Automaton()
+    for row_index, region_name in enumerate(REGION_NAMES_LOWER):
+        if region_name not in REGION_MATCHER:  # keep the first row for duplicate names
+            REGION_MATCHER.add_word(region_name, row_index)
+    REGION_MATCHER.make_automaton()
+else:
+    REGION_MATCHER = None
+
+# Build a spatial index once at startup so each lookup is O(log n) instead of a full scan
+if location_df is not None and BallTree is not None:
+    LOCATION_TREE = BallTree(np.column_stack((LAT_RAD, LON_RAD)), metric='haversine')
+else:
+    LOCATION_TREE = None
+
 # --- Database Model for User Data ---
 class UserInput(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -107,10 +206,10 @@ class RegularUser(UserMixin, db.Model):
 @login_manager.user_loader
 def load_user(user_id):
     # Try admin first, then regular user
-    user = AdminUser.query.get(int(user_id))
+    user = db.session.get(AdminUser, int(user_id))
     if user:
         return user
-    return RegularUser.query.get(int(user_id))
+    return db.session.get(RegularUser, int(user_id))
 
 # Admin required decorator
 def admin_required(f):
@@ -123,43 +222,121 @@ def admin_required(f):
 
 # --- Core Calculation Functions ---
 
-def haversine(lat1, lon1, lat2, lon2):
+EARTH_RADIUS_KM = 6371.0
+
+def haversine(lat1, lon1, lat2, lon2, _diameter=2 * EARTH_RADIUS_KM, _rad=pi / 180, _half_rad=pi / 360):
     """Calculate the distance between two points on Earth using the Haversine formula."""
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-    r = 6371  # Radius of Earth in kilometers
-    return c * r
+    # Straight-line form with no temporary list; the trailing defaults bind the
+    # constants as fast locals and are never passed by callers.
+    dlat = sin((lat2 - lat1) * _half_rad)
+    dlon = sin((lon2 - lon1) * _half_rad)
+    a = dlat * dlat + cos(lat1 * _rad) * cos(lat2 * _rad) * dlon * dlon
+    return _diameter * asin(sqrt(a))
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def haversine_nb(lat1, lon1, lat2, lon2):
+        """JIT-compiled scalar Haversine distance (km); same arguments as haversine."""
+        lat1 = np.radians(lat1)
+        lon1 = np.radians(lon1)
+        lat2 = np.radians(lat2)
+        lon2 = np.radians(lon2)
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+    @njit(cache=True, fastmath=True)
+    def haversine_nb_arr(user_lat, user_lon, lats_rad, lons_rad, out):
+        """JIT-compiled Haversine distances (km) from one point to arrays of points in radians, filling `out`."""
+        lat1 = np.radians(user_lat)
+        lon1 = np.radians(user_lon)
+        cos_lat1 = np.cos(lat1)
+        for i in range(lats_rad.shape[0]):
+            a = (np.sin((lats_rad[i] - lat1) / 2) ** 2
+                 + cos_lat1 * np.cos(lats_rad[i]) * np.sin((lons_rad[i] - lon1) / 2) ** 2)
+            out[i] = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+        return out
+else:
+    haversine_nb = haversine_nb_arr = None
+
+# Scratch buffers for the distance scan. They are per thread because threaded
+# servers run requests concurrently and NumPy releases the GIL inside ufuncs.
+_distance_scratch = threading.local()
+
+def _location_distances(user_lat, user_lon):
+    """Distances (km) from a point to every location, computed in this thread's scratch buffers.
+
+    The returned array is overwritten by the next call on the same thread.
+    """
+    if not hasattr(_distance_scratch, 'buffers'):
+        _distance_scratch.buffers = (np.empty_like(LAT_RAD), np.empty_like(LAT_RAD))
+    dist, work = _distance_scratch.buffers
+
+    if haversine_nb_arr is not None:
+        return haversine_nb_arr(user_lat, user_lon, LAT_RAD, LON_RAD, dist)
+
+    # NumPy fallback: the Haversine formula evaluated in place
+    lat1 = radians(user_lat)
+    lon1 = radians(user_lon)
+    np.subtract(LAT_RAD, lat1, out=dist)
+    dist *= 0.5
+    np.sin(dist, out=dist)
+    np.square(dist, out=dist)
+    np.subtract(LON_RAD, lon1, out=work)
+    work *= 0.5
+    np.sin(work, out=work)
+    np.square(work, out=work)
+    np.multiply(work, COS_LAT, out=work)
+    work *= cos(lat1)
+    dist += work
+    np.sqrt(dist, out=dist)
+    np.arcsin(dist, out=dist)
+    dist *= 2 * EARTH_RADIUS_KM
+    return dist
 
 def get_nearest_location(user_lat, user_lon):
-    """Find the nearest location from the CSV based on user's GPS coordinates."""
+    """Find the nearest location from the CSV based on user's GPS coordinates.
+
+    Returns the CSV row as a dict plus 'distance' (km) and the pre-computed
+    '_poor_water_quality' / '_recharge_restricted' safety flags.
+    """
     if location_df is None:
         return None
-    df = location_df.copy() # Use a copy to avoid modifying the global DataFrame
-    df['distance'] = df.apply(
-        lambda row: haversine(user_lat, user_lon, row['Latitude'], row['Longitude']),
-        axis=1
-    )
-    nearest_row = df.loc[df['distance'].idxmin()]
-    return nearest_row.to_dict()
+    if LOCATION_TREE is not None:
+        dist, ind = LOCATION_TREE.query(np.radians([[user_lat, user_lon]]), k=1)
+        idx = int(ind[0, 0])
+        distance = float(dist[0, 0]) * EARTH_RADIUS_KM
+    else:
+        distances = _location_distances(user_lat, user_lon)
+        idx = int(np.argmin(distances))
+        distance = float(distances[idx])
+    nearest = dict(LOCATION_RECORDS[idx])
+    nearest['distance'] = distance
+    return nearest
 
 def get_mock_location_data(location_name, user_lat=None, user_lon=None):
-    """Get location data by name from the mock CSV."""
+    """Get location data by name from the mock CSV.
+
+    Like get_nearest_location, the returned dict includes the '_poor_water_quality'
+    and '_recharge_restricted' safety flags.
+    """
     if location_df is None:
         return None
-    for index, row in location_df.iterrows():
-        if row['Region_Name'].lower() in location_name.lower():
-            match_dict = row.to_dict()
-            if user_lat and user_lon:
-                match_dict['distance'] = haversine(user_lat, user_lon, match_dict['Latitude'], match_dict['Longitude'])
-            return match_dict
-    
-    match = location_df[location_df['Region_Name'].str.lower() == location_name.lower()]
-    if not match.empty:
-        return match.to_dict('records')[0]
-    return None
+    # Find the first region (in file order) whose name appears anywhere in the given location name
+    if REGION_MATCHER is not None:
+        matches = [row_index for _, row_index in REGION_MATCHER.iter(location_name.lower())]
+        if not matches:
+            return None
+        row_index = min(matches)
+    else:
+        mask = np.char.find(location_name.lower(), REGION_NAMES_LOWER) >= 0
+        if not mask.any():
+            return None
+        row_index = int(np.argmax(mask))
+    match_dict = dict(LOCATION_RECORDS[row_index])
+    if user_lat and user_lon:
+        distance_fn = haversine_nb if haversine_nb is not None else haversine
+        match_dict['distance'] = float(distance_fn(user_lat, user_lon, match_dict['Latitude'], match_dict['Longitude']))
+    return match_dict
 
 def calculate_runoff_potential(roof_area_m2, rainfall_mm, runoff_coefficient):
     """Calculate annual runoff generation capacity."""
@@ -171,32 +348,52 @@ def calculate_runoff_potential(roof_area_m2, rainfall_mm, runoff_coefficient):
         'daily_average': annual_runoff_liters / 365
     }
 
+# Fallback values for location fields that ad-hoc location data (e.g. the API) may omit
+LOCATION_DEFAULTS = {
+    'Runoff_Coefficient': 0.8,
+    'Groundwater_Depth_m': 10,
+    'Soil_Type': 'Loamy',
+    'Infiltration_Rate_mm_per_hr': 15,
+    'Water_Quality': 'Good',
+    'Remarks': ''
+}
+
+def _normalize_location(location_data):
+    """Return a copy of location_data with defaults and the derived safety flags filled in."""
+    normalized = {**LOCATION_DEFAULTS, **location_data}
+    # Rows from the CSV carry pre-computed flags; derive them for anything else
+    if '_poor_water_quality' not in normalized:
+        normalized['_poor_water_quality'] = normalized['Water_Quality'].lower() in POOR_WATER_QUALITIES
+    if '_recharge_restricted' not in normalized:
+        remarks = normalized['Remarks'].lower()
+        normalized['_recharge_restricted'] = any(term in remarks for term in RESTRICTED_REMARK_TERMS)
+    return normalized
+
 def validate_artificial_recharge_safety(location_data):
-    """Check if artificial recharge is safe based on multiple factors."""
+    """Check if artificial recharge is safe based on multiple factors.
+
+    Expects location data that has been through _normalize_location.
+    """
     safety_issues = []
     is_safe = True
     
     # Check groundwater depth
-    gw_depth = location_data.get('Groundwater_Depth_m', 10)
-    if gw_depth < 3:
+    if location_data['Groundwater_Depth_m'] < 3:
         safety_issues.append("Shallow groundwater (<3m) - Risk of waterlogging and contamination")
         is_safe = False
     
     # Check water quality
-    water_quality = location_data.get('Water_Quality', 'Good')
-    if water_quality.lower() in ['poor', 'contaminated']:
+    if location_data['_poor_water_quality']:
         safety_issues.append("Poor groundwater quality - Recharge may worsen contamination")
         is_safe = False
     
     # Check soil infiltration rate
-    infiltration_rate = location_data.get('Infiltration_Rate_mm_per_hr', 15)
-    if infiltration_rate < 5:
+    if location_data['Infiltration_Rate_mm_per_hr'] < 5:
         safety_issues.append("Low soil infiltration (<5mm/hr) - Water will stagnate")
         is_safe = False
     
     # Check aquifer type and remarks for regulatory issues
-    remarks = location_data.get('Remarks', '').lower()
-    if 'overexploited' in remarks or 'prohibited' in remarks:
+    if location_data['_recharge_restricted']:
         safety_issues.append("Regulatory restrictions - Check CGWA guidelines")
         is_safe = False
     
@@ -206,71 +403,122 @@ def validate_artificial_recharge_safety(location_data):
         'alternatives': ['Storage tank only', 'Community structures', 'Water conservation'] if not is_safe else []
     }
 
-def determine_category(roof_area, open_space, rainfall, soil_type, gw_depth, infiltration_rate):
-    """Classify user into 6 categories based on multiple criteria."""
-    
+# Display details for each recharge category, indexed by category number
+CATEGORY_DETAILS = {
+    1: {
+        'name': 'Storage Tank Only',
+        'description': 'Small urban homes, apartments with limited space/rainfall',
+        'recommended_structures': ['Above-ground storage tank (1,000-5,000L)', 'First flush diverter'],
+        'recharge_feasible': False
+    },
+    2: {
+        'name': 'Storage + Small Recharge Pit',
+        'description': 'Small/medium homes with limited yard space',
+        'recommended_structures': ['Storage tank (3,000-8,000L)', 'Recharge pit (1×1×2m)', 'Sand-gravel-boulder filter'],
+        'recharge_feasible': True
+    },
+    3: {
+        'name': 'Recharge Pit/Trench + Storage Tank',
+        'description': 'Medium houses with good space and rainfall',
+        'recommended_structures': ['Storage tank (5,000-15,000L)', 'Multiple recharge pits', 'Trench system (10-20m)'],
+        'recharge_feasible': True
+    },
+    4: {
+        'name': 'Recharge Shaft / Borewell Recharge',
+        'description': 'Large homes, multi-story buildings',
+        'recommended_structures': ['Storage tank (10,000-25,000L)', 'Recharge shaft (25-30m deep)', 'Injection well'],
+        'recharge_feasible': True
+    },
+    5: {
+        'name': 'Recharge Pond / Community Structures',
+        'description': 'Institutions, farms, large plots, apartments',
+        'recommended_structures': ['Large storage (25,000-100,000L)', 'Percolation pond (10×10×2-3m)', 'Check dams'],
+        'recharge_feasible': True
+    },
+    6: {
+        'name': 'Supplementary Only',
+        'description': 'Very small homes, low rainfall zones',
+        'recommended_structures': ['Small tank (500-2,000L)', 'Community systems', 'Water efficiency focus'],
+        'recharge_feasible': False
+    }
+}
+
+def category_details(category):
+    """Build the category info dict returned to templates and API clients."""
+    details = CATEGORY_DETAILS[category]
+    return {
+        'category': category,
+        'name': details['name'],
+        'description': details['description'],
+        'recommended_structures': list(details['recommended_structures']),
+        'recharge_feasible': details['recharge_feasible']
+    }
+
+def _lower_in(value, choices):
+    """Case-insensitive membership test for a string or a NumPy array of strings."""
+    if isinstance(value, np.ndarray):
+        return np.isin(np.char.lower(value), choices)
+    return value.lower() in choices
+
+# Classification rules, checked in order; the first match wins and anything unmatched
+# is category 6 (Supplementary Only). Each rule is (category, combine, conditions),
+# where combine says whether any or all of its (field, comparison, value) conditions
+# must hold. The comparisons work on scalars and NumPy arrays alike, so
+# determine_category and determine_category_vec share this single table.
+CATEGORY_RULES = (
     # Category 1: Storage Tank Only
-    if (roof_area < 50 or open_space < 10 or rainfall < 600 or gw_depth < 3 or 
-        infiltration_rate < 5):
-        return {
-            'category': 1,
-            'name': 'Storage Tank Only',
-            'description': 'Small urban homes, apartments with limited space/rainfall',
-            'recommended_structures': ['Above-ground storage tank (1,000-5,000L)', 'First flush diverter'],
-            'recharge_feasible': False
-        }
-    
+    (1, 'any', (('roof_area', operator.lt, 50), ('open_space', operator.lt, 10), ('rainfall', operator.lt, 600),
+                ('gw_depth', operator.lt, 3), ('infiltration_rate', operator.lt, 5))),
     # Category 2: Storage + Small Recharge Pit
-    elif (50 <= roof_area <= 150 and 10 <= open_space <= 25 and 600 <= rainfall <= 1000 and 
-          3 <= gw_depth <= 8 and soil_type.lower() in ['sandy', 'loamy']):
-        return {
-            'category': 2,
-            'name': 'Storage + Small Recharge Pit',
-            'description': 'Small/medium homes with limited yard space',
-            'recommended_structures': ['Storage tank (3,000-8,000L)', 'Recharge pit (1×1×2m)', 'Sand-gravel-boulder filter'],
-            'recharge_feasible': True
-        }
-    
+    (2, 'all', (('roof_area', operator.ge, 50), ('roof_area', operator.le, 150),
+                ('open_space', operator.ge, 10), ('open_space', operator.le, 25),
+                ('rainfall', operator.ge, 600), ('rainfall', operator.le, 1000),
+                ('gw_depth', operator.ge, 3), ('gw_depth', operator.le, 8),
+                ('soil_type', _lower_in, ('sandy', 'loamy')))),
     # Category 3: Recharge Pit/Trench + Storage Tank
-    elif (150 <= roof_area <= 400 and 25 <= open_space <= 100 and 1000 <= rainfall <= 1400 and 
-          5 <= gw_depth <= 15):
-        return {
-            'category': 3,
-            'name': 'Recharge Pit/Trench + Storage Tank',
-            'description': 'Medium houses with good space and rainfall',
-            'recommended_structures': ['Storage tank (5,000-15,000L)', 'Multiple recharge pits', 'Trench system (10-20m)'],
-            'recharge_feasible': True
-        }
-    
+    (3, 'all', (('roof_area', operator.ge, 150), ('roof_area', operator.le, 400),
+                ('open_space', operator.ge, 25), ('open_space', operator.le, 100),
+                ('rainfall', operator.ge, 1000), ('rainfall', operator.le, 1400),
+                ('gw_depth', operator.ge, 5), ('gw_depth', operator.le, 15))),
     # Category 4: Recharge Shaft / Borewell Recharge
-    elif (400 <= roof_area <= 1000 and open_space >= 50 and rainfall > 1000 and gw_depth > 15):
-        return {
-            'category': 4,
-            'name': 'Recharge Shaft / Borewell Recharge',
-            'description': 'Large homes, multi-story buildings',
-            'recommended_structures': ['Storage tank (10,000-25,000L)', 'Recharge shaft (25-30m deep)', 'Injection well'],
-            'recharge_feasible': True
-        }
-    
+    (4, 'all', (('roof_area', operator.ge, 400), ('roof_area', operator.le, 1000),
+                ('open_space', operator.ge, 50), ('rainfall', operator.gt, 1000), ('gw_depth', operator.gt, 15))),
     # Category 5: Recharge Pond / Community Structures
-    elif (roof_area > 1000 and open_space > 200 and rainfall > 800):
-        return {
-            'category': 5,
-            'name': 'Recharge Pond / Community Structures',
-            'description': 'Institutions, farms, large plots, apartments',
-            'recommended_structures': ['Large storage (25,000-100,000L)', 'Percolation pond (10×10×2-3m)', 'Check dams'],
-            'recharge_feasible': True
-        }
-    
-    # Category 6: Supplementary Only
-    else:
-        return {
-            'category': 6,
-            'name': 'Supplementary Only',
-            'description': 'Very small homes, low rainfall zones',
-            'recommended_structures': ['Small tank (500-2,000L)', 'Community systems', 'Water efficiency focus'],
-            'recharge_feasible': False
-        }
+    (5, 'all', (('roof_area', operator.gt, 1000), ('open_space', operator.gt, 200), ('rainfall', operator.gt, 800))),
+)
+DEFAULT_CATEGORY = 6  # Supplementary Only
+
+def determine_category(roof_area, open_space, rainfall, soil_type, gw_depth, infiltration_rate):
+    """Classify user into 6 categories based on multiple criteria."""
+    values = {
+        'roof_area': roof_area,
+        'open_space': open_space,
+        'rainfall': rainfall,
+        'soil_type': soil_type,
+        'gw_depth': gw_depth,
+        'infiltration_rate': infiltration_rate
+    }
+    for category, combine, conditions in CATEGORY_RULES:
+        checks = (compare(values[field], limit) for field, compare, limit in conditions)
+        if (any(checks) if combine == 'any' else all(checks)):
+            return category_details(category)
+    return category_details(DEFAULT_CATEGORY)
+
+def determine_category_vec(roof_area, open_space, rainfall, soil_type, gw_depth, infiltration_rate):
+    """Vectorized determine_category: classify arrays of scenarios, returning an array of category numbers."""
+    values = {
+        'roof_area': np.asarray(roof_area, dtype=np.float64),
+        'open_space': np.asarray(open_space, dtype=np.float64),
+        'rainfall': np.asarray(rainfall, dtype=np.float64),
+        'soil_type': np.asarray(soil_type, dtype=str),
+        'gw_depth': np.asarray(gw_depth, dtype=np.float64),
+        'infiltration_rate': np.asarray(infiltration_rate, dtype=np.float64)
+    }
+    masks = []
+    for _, combine, conditions in CATEGORY_RULES:
+        checks = [compare(values[field], limit) for field, compare, limit in conditions]
+        masks.append(np.logical_or.reduce(checks) if combine == 'any' else np.logical_and.reduce(checks))
+    return np.select(masks, [category for category, _, _ in CATEGORY_RULES], default=DEFAULT_CATEGORY)
 
 def calculate_structure_dimensions(runoff_volume, soil_infiltration, available_space):
     """Suggest structure dimensions based on runoff volume and site conditions."""
@@ -315,29 +563,25 @@ def calculate_structure_dimensions(runoff_volume, soil_infiltration, available_s
     
     return dimensions
 
+# Cost model per structure type: (base cost, installation, annual maintenance) in ₹.
+# The storage tank's base cost is per liter of tank capacity.
+STRUCTURE_COSTS = {
+    'storage_tank': (15, 5000, 2000),
+    'recharge_pit': (15000, 8000, 3000),
+    'recharge_trench': (25000, 12000, 4000)
+}
+
 def estimate_costs_and_payback(structure_type, dimensions, annual_runoff, local_water_cost=0.16):
     """Calculate construction costs and payback period."""
-    costs = {
-        'storage_tank': {
-            'base_cost': dimensions.get('storage', {}).get('capacity_liters', 5000) * 15,
-            'installation': 5000,
-            'maintenance_annual': 2000
-        },
-        'recharge_pit': {
-            'base_cost': 15000,
-            'installation': 8000,
-            'maintenance_annual': 3000
-        },
-        'recharge_trench': {
-            'base_cost': 25000,
-            'installation': 12000,
-            'maintenance_annual': 4000
-        }
-    }
+    if structure_type not in STRUCTURE_COSTS:
+        structure_type = 'storage_tank'
+    base_cost, installation, maintenance_annual = STRUCTURE_COSTS[structure_type]
+    if structure_type == 'storage_tank':
+        base_cost *= dimensions.get('storage', {}).get('capacity_liters', 5000)
     
-    total_cost = sum(costs.get(structure_type, costs['storage_tank']).values()) - costs.get(structure_type, costs['storage_tank'])['maintenance_annual']
+    total_cost = base_cost + installation
     annual_water_value = annual_runoff * local_water_cost
-    annual_savings = annual_water_value - costs.get(structure_type, costs['storage_tank'])['maintenance_annual']
+    annual_savings = annual_water_value - maintenance_annual
     
     payback_years = total_cost / annual_savings if annual_savings > 0 else float('inf')
     
@@ -387,18 +631,36 @@ def get_purification_recommendations(intended_use, roof_type, location_data):
         'water_quality_expected': 'Potable' if 'drinking' in intended_use.lower() else 'Non-potable suitable'
     }
 
+@dataclass
+class FeasibilityResult:
+    """Outcome of calculate_comprehensive_feasibility, as consumed by the results page, PDF and API."""
+    __slots__ = ('runoff_data', 'safety_check', 'category', 'structure_dimensions', 'cost_analysis',
+                 'purification', 'annual_demand', 'feasibility_percentage', 'feasibility_status')
+    runoff_data: dict
+    safety_check: dict
+    category: dict
+    structure_dimensions: dict
+    cost_analysis: dict
+    purification: dict
+    annual_demand: float
+    feasibility_percentage: float
+    feasibility_status: str
+
 def calculate_comprehensive_feasibility(location_data, user_input):
     """Enhanced feasibility calculation with safety checks and categorization."""
     
+    # Fill in missing location fields once, so everything below can index directly
+    location_data = _normalize_location(location_data)
+    
     # Extract parameters
     rainfall_mm = location_data['Rainfall_mm']
     roof_area = user_input.rooftop_area
     open_space = user_input.open_space_area or 0
-    runoff_coeff = location_data.get('Runoff_Coefficient', 0.8)
+    runoff_coeff = location_data['Runoff_Coefficient']
     household_size = user_input.household_size
-    soil_type = location_data.get('Soil_Type', 'Loamy')
-    gw_depth = location_data.get('Groundwater_Depth_m', 10)
-    infiltration_rate = location_data.get('Infiltration_Rate_mm_per_hr', 15)
+    soil_type = location_data['Soil_Type']
+    gw_depth = location_data['Groundwater_Depth_m']
+    infiltration_rate = location_data['Infiltration_Rate_mm_per_hr']
     
     # Calculate runoff potential
     runoff_data = calculate_runoff_potential(roof_area, rainfall_mm, runoff_coeff)
@@ -442,17 +704,79 @@ def calculate_comprehensive_feasibility(location_data, user_input):
     else:
         feasibility_status = "Not Feasible"
     
-    return {
-        'runoff_data': runoff_data,
-        'safety_check': safety_check,
-        'category': category_info,
-        'structure_dimensions': structure_dims,
-        'cost_analysis': cost_analysis,
-        'purification': purification,
-        'annual_demand': annual_demand,
-        'feasibility_percentage': round(feasibility_percentage, 1),
-        'feasibility_status': feasibility_status
-    }
+    return FeasibilityResult(
+        runoff_data=runoff_data,
+        safety_check=safety_check,
+        category=category_info,
+        structure_dimensions=structure_dims,
+        cost_analysis=cost_analysis,
+        purification=purification,
+        annual_demand=annual_demand,
+        feasibility_percentage=round(feasibility_percentage, 1),
+        feasibility_status=feasibility_status
+    )
+
+# --- Cached Analysis ---
+# The analysis (and the PDF report built from it) depends only on the entry's column
+# values, so it is memoized on a key made of all of them. SQLite can re-issue the id
+# of a deleted row, and other workers never see a delete, so the id alone is not a
+# safe key; with the full row as key a re-used id simply misses the cache.
+ENTRY_FIELDS = tuple(column.name for column in UserInput.__table__.columns)
+
+def _entry_key(user_data):
+    """Hashable snapshot of every column of a stored entry, used as the cache key."""
+    return tuple(getattr(user_data, field) for field in ENTRY_FIELDS)
+
+@lru_cache(maxsize=512)
+def _analysis_for(entry_key):
+    """Resolve location data and run the feasibility analysis for a stored entry."""
+    user_data = SimpleNamespace(**dict(zip(ENTRY_FIELDS, entry_key)))
+
+    # Determine the nearest mock location using GPS or manual name
+    if user_data.user_lat and user_data.user_lon:
+        location_data = get_nearest_location(user_data.user_lat, user_data.user_lon)
+    else:
+        location_data = get_mock_location_data(user_data.location_name, user_data.user_lat, user_data.user_lon)
+        # If location is found manually, distance is not calculated, so set to 0.
+        if location_data:
+            location_data['distance'] = 0
+
+    if not location_data:
+        return None
+
+    return location_data, calculate_comprehensive_feasibility(location_data, user_data)
+
+# --- HTTP Caching ---
+# Per-entry pages only change with the entry itself or with app.py, results.html or the
+# location CSV, so their ETags combine a digest of the entry's row (see _entry_key)
+# with the newest modification time of those files.
+CACHE_VERSION = str(int(max(
+    os.path.getmtime(path)
+    for path in (__file__, os.path.join(BASE_DIR, 'templates', 'results.html'), CSV_FILE_PATH)
+    if os.path.exists(path)
+)))
+CACHE_MAX_AGE = 3600  # seconds
+
+def _entry_etag(user_data):
+    """Weak ETag identifying the rendered output for a stored entry."""
+    row_digest = hashlib.blake2b(repr(_entry_key(user_data)).encode('utf-8'), digest_size=8).hexdigest()
+    return f'rwh-{user_data.id}-{row_digest}-{CACHE_VERSION}'
+
+def _with_cache_headers(response, etag):
+    """Attach the ETag and a private Cache-Control header to a per-entry response."""
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = f'private, max-age={CACHE_MAX_AGE}'
+    return response
+
+# --- Form Parsing Helpers ---
+
+def _to_float(value, default=0.0):
+    """Convert a submitted form value to float, using the default for empty values."""
+    return float(value) if value else default
+
+def _to_int(value, default=0):
+    """Convert a submitted form value to int, using the default for empty values."""
+    return int(value) if value else default
 
 # --- Flask Routes ---
 
@@ -514,11 +838,11 @@ def submit_form():
     intended_use = request.form.get('intended_use')  # NEW
     
     # Convert to appropriate types
-    user_lat = float(user_lat) if user_lat else None
-    user_lon = float(user_lon) if user_lon else None
-    household_size = int(household_size) if household_size else 0
-    rooftop_area = float(rooftop_area) if rooftop_area else 0.0
-    open_space_area = float(open_space_area) if open_space_area else 0.0
+    user_lat = _to_float(user_lat, None)
+    user_lon = _to_float(user_lon, None)
+    household_size = _to_int(household_size)
+    rooftop_area = _to_float(rooftop_area)
+    open_space_area = _to_float(open_space_area)
     
     # Create a new UserInput object with enhanced fields
     new_entry = UserInput(
@@ -536,110 +860,112 @@ def submit_form():
         intended_use=intended_use
     )
     
+    # Flush to get the new id from the INSERT itself, then commit. Reading new_entry.id
+    # after the commit would cost an extra SELECT, because the commit expires the instance.
     db.session.add(new_entry)
+    db.session.flush()
+    new_entry_id = new_entry.id
     db.session.commit()
     
     # Reverting to a standard redirect, which works best with a native form submission
     # and is more reliable in avoiding browser navigation quirks.
-    return redirect(url_for('results_page', entry_id=new_entry.id))
+    return redirect(url_for('results_page', entry_id=new_entry_id))
 
 @app.route('/results/<int:entry_id>')
 def results_page(entry_id):
     # Retrieve user data from the database
-    user_data = UserInput.query.get_or_404(entry_id)
+    user_data = db.get_or_404(UserInput, entry_id)
+    
+    # Let the browser reuse its copy if the page has not changed
+    etag = _entry_etag(user_data)
+    if request.if_none_match.contains_weak(etag):
+        return _with_cache_headers(make_response('', 304), etag)
     
     try:
-        # Determine the nearest mock location using GPS or manual name
-        if user_data.user_lat and user_data.user_lon:
-            nearest_city_data = get_nearest_location(user_data.user_lat, user_data.user_lon)
-        else:
-            nearest_city_data = get_mock_location_data(user_data.location_name, user_data.user_lat, user_data.user_lon)
-            # If location is found manually, distance is not calculated, so set to 0.
-            if nearest_city_data:
-                nearest_city_data['distance'] = 0
-            
+        # Resolve the location and run the feasibility analysis (cached per entry)
+        cached = _analysis_for(_entry_key(user_data))
     except FileNotFoundError:
         error_message = "Server configuration error: The location data file could not be found."
         print(f"ERROR: {error_message}")
         return error_message, 500
     
-    if not nearest_city_data:
+    if not cached:
         return "Error: Could not find data for your location.", 404
     
-    # Perform comprehensive feasibility analysis
-    comprehensive_analysis = calculate_comprehensive_feasibility(nearest_city_data, user_data)
+    nearest_city_data, comprehensive_analysis = cached
     
     # Pass all data to the HTML template
-    return render_template('results.html',
-                         user_data=user_data,
-                         location_data=nearest_city_data,
-                         analysis=comprehensive_analysis)
-
-@app.route('/download_report/<int:entry_id>')
-def download_report(entry_id):
-    # Retrieve user data and perform analysis (same logic as results_page)
-    user_data = UserInput.query.get_or_404(entry_id)
-    
-    if user_data.user_lat and user_data.user_lon:
-        location_data = get_nearest_location(user_data.user_lat, user_data.user_lon)
-    else:
-        location_data = get_mock_location_data(user_data.location_name, user_data.user_lat, user_data.user_lon)
-        if location_data:
-            location_data['distance'] = 0
-
-    if not location_data:
-        return "Error: Could not find data for your location.", 404
-
-    analysis = calculate_comprehensive_feasibility(location_data, user_data)
-
-    # --- PDF Generation with FPDF2 - Now with Unicode font support ---
-    class PDF(FPDF):
-        def __init__(self, *args, **kwargs):
-            super().__init__(*args, **kwargs)
-            # Add a Unicode font (DejaVu is included with fpdf2)
-            # Provide the full path to the font file
-            self.add_font('DejaVu', '', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf')
-            self.add_font('DejaVu', 'B', '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf')
-            self.set_font('DejaVu', '', 12)
-
-        def header(self):
-            self.set_font('DejaVu', 'B', 12)
-            self.cell(0, 10, 'Rooftop Rainwater Harvesting Report', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
-            self.ln(5)
-
-        def footer(self):
-            self.set_y(-15)
-            self.set_font('DejaVu', '', 8)
-            self.cell(0, 10, f'Page {self.page_no()}', align='C')
-
-        def section_title(self, title):
-            self.set_font('DejaVu', 'B', 14)
-            self.set_text_color(0, 77, 76)
-            self.cell(0, 10, title, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
-            self.line(self.get_x(), self.get_y(), self.get_x() + 190, self.get_y())
-            self.ln(4)
-        
-        def write_key_value_table(self, data):
-            self.set_font('DejaVu', '', 11)
-            self.set_text_color(51, 51, 51)
-            key_col_width = 65
-            val_col_width = self.w - self.l_margin - self.r_margin - key_col_width
-            line_height = self.font_size * 1.5
-            for key, value in data.items():
-                self.set_font('DejaVu', 'B')
-                self.cell(key_col_width, line_height, key, border=0)
-                self.set_font('DejaVu', '')
-                self.multi_cell(val_col_width, line_height, str(value), border=0, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-            self.ln(5)
-
-        def write_list(self, items):
-            self.set_font('DejaVu', '', 11)
-            self.set_text_color(51, 51, 51)
-            for item in items:
-                self.multi_cell(0, 5, f'- {item}')
-                self.ln(2)
-            self.ln(5)
+    response = make_response(render_template('results.html',
+                                              user_data=user_data,
+                                              location_data=nearest_city_data,
+                                              analysis=comprehensive_analysis))
+    return _with_cache_headers(response, etag)
+
+# --- PDF Report ---
+
+# Unicode font files (DejaVu ships with most Linux distributions)
+PDF_FONT_REGULAR = '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+PDF_FONT_BOLD = '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf'
+PDF_KEY_COL_WIDTH = 65
+PDF_LINE_HEIGHT_FACTOR = 1.5
+
+class PDF(FPDF):
+    """FPDF2 document with the report's header, footer and section helpers."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Add a Unicode font so that characters like ₹ and ² render correctly
+        self.add_font('DejaVu', '', PDF_FONT_REGULAR)
+        self.add_font('DejaVu', 'B', PDF_FONT_BOLD)
+        self.set_font('DejaVu', '', 12)
+
+    def header(self):
+        self.set_font('DejaVu', 'B', 12)
+        self.cell(0, 10, 'Rooftop Rainwater Harvesting Report', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
+        self.ln(5)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('DejaVu', '', 8)
+        self.cell(0, 10, f'Page {self.page_no()}', align='C')
+
+    def section_title(self, title):
+        self.set_font('DejaVu', 'B', 14)
+        self.set_text_color(0, 77, 76)
+        self.cell(0, 10, title, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
+        self.line(self.get_x(), self.get_y(), self.get_x() + 190, self.get_y())
+        self.ln(4)
+
+    def write_key_value_table(self, data):
+        self.set_font('DejaVu', '', 11)
+        self.set_text_color(51, 51, 51)
+        val_col_width = self.epw - PDF_KEY_COL_WIDTH
+        line_height = self.font_size * PDF_LINE_HEIGHT_FACTOR
+        for key, value in data.items():
+            self.set_font('DejaVu', 'B')
+            self.cell(PDF_KEY_COL_WIDTH, line_height, key, border=0)
+            self.set_font('DejaVu', '')
+            self.multi_cell(val_col_width, line_height, str(value), border=0, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        self.ln(5)
+
+    def write_list(self, items):
+        self.set_font('DejaVu', '', 11)
+        self.set_text_color(51, 51, 51)
+        for item in items:
+            self.multi_cell(0, 5, f'- {item}')
+            self.ln(2)
+        self.ln(5)
+
+@lru_cache(maxsize=512)
+def _build_pdf_bytes(entry_key, report_date):
+    """Render the PDF report for a stored entry. Cached per entry and report date."""
+    user_data = SimpleNamespace(**dict(zip(ENTRY_FIELDS, entry_key)))
+    cached = _analysis_for(entry_key)
+    if not cached:
+        return None
+    location_data, analysis = cached
 
+    # --- PDF Generation with FPDF2 ---
     pdf = PDF()
     pdf.add_page()
     pdf.set_font('DejaVu', 'B', 24)
@@ -647,7 +973,7 @@ def download_report(entry_id):
     pdf.cell(0, 10, 'Rooftop Rainwater Harvesting Report', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
     pdf.set_font('DejaVu', '', 11)
     pdf.set_text_color(51, 51, 51)
-    pdf.cell(0, 10, f'Report generated on: {datetime.now().strftime("%d %B %Y")}', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
+    pdf.cell(0, 10, f'Report generated on: {report_date}', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
     pdf.ln(10)
 
     pdf.section_title('1. Your Property Details')
@@ -680,39 +1006,39 @@ def download_report(entry_id):
 
     pdf.section_title('4. Feasibility Assessment')
     pdf.write_key_value_table({
-        "Annual Harvest Potential": f"{analysis['runoff_data']['annual_liters']:,.0f} Liters",
-        "Household Water Demand": f"{analysis['annual_demand']:,.0f} Liters",
-        "Demand Coverage": f"{analysis['feasibility_percentage']}%",
-        "Feasibility Status": analysis['feasibility_status'],
+        "Annual Harvest Potential": f"{analysis.runoff_data['annual_liters']:,.0f} Liters",
+        "Household Water Demand": f"{analysis.annual_demand:,.0f} Liters",
+        "Demand Coverage": f"{analysis.feasibility_percentage}%",
+        "Feasibility Status": analysis.feasibility_status,
     })
 
     pdf.section_title('5. Personalized Recommendations')
     pdf.write_key_value_table({
-        "Category": f"Category {analysis['category']['category']}: {analysis['category']['name']}",
-        "Description": analysis['category']['description'],
+        "Category": f"Category {analysis.category['category']}: {analysis.category['name']}",
+        "Description": analysis.category['description'],
     })
     pdf.set_font('DejaVu', 'B', 11)
     pdf.cell(0, 10, "Recommended Structures:", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-    pdf.write_list(analysis['category']['recommended_structures'])
+    pdf.write_list(analysis.category['recommended_structures'])
 
     pdf.section_title('6. Safety Assessment for Groundwater Recharge')
-    safety_status = "Safe" if analysis['safety_check']['is_safe'] else "Caution Advised"
+    safety_status = "Safe" if analysis.safety_check['is_safe'] else "Caution Advised"
     pdf.write_key_value_table({"Status": safety_status})
-    if not analysis['safety_check']['is_safe']:
+    if not analysis.safety_check['is_safe']:
         pdf.set_font('DejaVu', 'B', 11)
         pdf.cell(0, 10, "Potential Issues:", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-        pdf.write_list(analysis['safety_check']['safety_issues'])
+        pdf.write_list(analysis.safety_check['safety_issues'])
         pdf.set_font('DejaVu', 'B', 11)
         pdf.cell(0, 10, "Alternatives:", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-        pdf.write_list(analysis['safety_check']['alternatives'])
+        pdf.write_list(analysis.safety_check['alternatives'])
 
     pdf.section_title('7. Recommended Dimensions & Costs')
     pdf.write_key_value_table({
-        "Storage Tank Capacity": f"{analysis['structure_dimensions']['storage']['capacity_liters']:,.0f} Liters",
-        "Storage Tank Est. Cost": analysis['structure_dimensions']['storage']['material_cost'].replace('₹', 'Rs. '),
+        "Storage Tank Capacity": f"{analysis.structure_dimensions['storage']['capacity_liters']:,.0f} Liters",
+        "Storage Tank Est. Cost": analysis.structure_dimensions['storage']['material_cost'].replace('₹', 'Rs. '),
     })
-    if 'pit' in analysis['structure_dimensions']:
-        pit = analysis['structure_dimensions']['pit']
+    if 'pit' in analysis.structure_dimensions:
+        pit = analysis.structure_dimensions['pit']
         pdf.write_key_value_table({
             "Recharge Pit Dimensions": f"{pit['length_m']}m x {pit['width_m']}m x {pit['depth_m']}m",
             "Recharge Pit Est. Cost": pit['material_cost'].replace('₹', 'Rs. '),
@@ -721,27 +1047,43 @@ def download_report(entry_id):
     pdf.section_title('8. Water Purification Plan')
     pdf.write_key_value_table({
         "Intended Use": user_data.intended_use,
-        "Maintenance Schedule": analysis['purification']['maintenance_schedule'],
-        "Est. Treatment System Cost": analysis['purification']['estimated_cost'].replace('₹', 'Rs. '),
+        "Maintenance Schedule": analysis.purification['maintenance_schedule'],
+        "Est. Treatment System Cost": analysis.purification['estimated_cost'].replace('₹', 'Rs. '),
     })
     pdf.set_font('DejaVu', 'B', 11)
     pdf.cell(0, 10, "Recommended Treatment Sequence:", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-    pdf.write_list(analysis['purification']['treatment_sequence'])
+    pdf.write_list(analysis.purification['treatment_sequence'])
 
     pdf.section_title('9. Financial Analysis')
     pdf.write_key_value_table({
-        "Initial Investment": f"Rs. {analysis['cost_analysis']['total_construction_cost']:,.0f}",
-        "Annual Savings": f"Rs. {analysis['cost_analysis']['annual_net_savings']:,.0f}",
-        "Payback Period": f"{analysis['cost_analysis']['payback_years']} years",
-        "ROI (20 years)": f"{analysis['cost_analysis']['roi_percentage']}%",
+        "Initial Investment": f"Rs. {analysis.cost_analysis['total_construction_cost']:,.0f}",
+        "Annual Savings": f"Rs. {analysis.cost_analysis['annual_net_savings']:,.0f}",
+        "Payback Period": f"{analysis.cost_analysis['payback_years']} years",
+        "ROI (20 years)": f"{analysis.cost_analysis['roi_percentage']}%",
     })
 
     # The .output() method returns a bytearray, which we convert to bytes
-    pdf_bytes = bytes(pdf.output())
-    response = make_response(pdf_bytes)
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = f'attachment; filename=RWH_Report_{user_data.name.replace(" ", "_")}.pdf'
-    return response
+    return bytes(pdf.output())
+
+@app.route('/download_report/<int:entry_id>')
+def download_report(entry_id):
+    user_data = db.get_or_404(UserInput, entry_id)
+
+    etag = _entry_etag(user_data)
+    if request.if_none_match.contains_weak(etag):
+        return _with_cache_headers(make_response('', 304), etag)
+
+    pdf_bytes = _build_pdf_bytes(_entry_key(user_data), datetime.now().strftime("%d %B %Y"))
+    if pdf_bytes is None:
+        return "Error: Could not find data for your location.", 404
+
+    response = send_file(
+        BytesIO(pdf_bytes),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f'RWH_Report_{user_data.name.replace(" ", "_")}.pdf'
+    )
+    return _with_cache_headers(response, etag)
 
 @app.route('/api/calculate', methods=['POST'])
 def api_calculate():
@@ -772,7 +1114,8 @@ def api_calculate():
     # Calculate comprehensive feasibility
     result = calculate_comprehensive_feasibility(mock_location, mock_user)
     
-    return jsonify(result)
+    # orjson serializes the dataclass (and any NumPy values) directly, much faster than jsonify
+    return app.response_class(orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY), mimetype='application/json')
 
 # --- ADMIN ROUTES ---
 
@@ -847,13 +1190,13 @@ def admin_users():
 @app.route('/admin/users/<int:user_id>')
 @admin_required
 def admin_user_detail(user_id):
-    user = UserInput.query.get_or_404(user_id)
+    user = db.get_or_404(UserInput, user_id)
     return render_template('admin/user_detail.html', user=user)
 
 @app.route('/admin/users/<int:user_id>/delete', methods=['POST'])
 @admin_required
 def admin_delete_user(user_id):
-    user = UserInput.query.get_or_404(user_id)
+    user = db.get_or_404(UserInput, user_id)
     db.session.delete(user)
     db.session.commit()
     flash(f'User {user.name} has been deleted successfully.', 'success')
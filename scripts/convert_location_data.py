@@ -0,0 +1,25 @@
+"""One-shot conversion of the location CSV into Parquet.
+
+The Flask app loads ``data/mock_location_data.parquet`` when it exists and is
+at least as new as the CSV, which skips text parsing and dtype inference on
+every worker start. Re-run this script whenever the CSV is edited:
+
+    python scripts/convert_location_data.py
+"""
+import os
+
+import pandas as pd
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CSV_FILE_PATH = os.path.join(BASE_DIR, 'data', 'mock_location_data.csv')
+PARQUET_FILE_PATH = os.path.join(BASE_DIR, 'data', 'mock_location_data.parquet')
+
+
+def main():
+    df = pd.read_csv(CSV_FILE_PATH)
+    df.to_parquet(PARQUET_FILE_PATH, engine='pyarrow', index=False)
+    print(f"Wrote {len(df)} rows to '{PARQUET_FILE_PATH}'")
+
+
+if __name__ == '__main__':
+    main()